@@ -1,16 +1,50 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, current_app, g, request
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from flask_compress import Compress
+import brotli
+import hashlib
 import logging
-from urllib.parse import urlparse
+import orjson
+import os
+import redis
 from datetime import datetime
 from scraper.web_scraper import WebScraper
-from middleware import SecurityMiddleware
+from middleware import SecurityMiddleware, parse_url
 
 
-scraper = WebScraper()
-app = Flask(__name__)
-CORS(app)
-security_middleware = SecurityMiddleware(app)
+# Redis config (cache and shared rate limiting are disabled when REDIS_URL is not set)
+CACHE_TTL = int(os.environ.get('CACHE_TTL', 3600))
+CACHE_MAX_AGE = int(os.environ.get('CACHE_MAX_AGE', 600))
+MAX_BATCH_URLS = 20
+# Socket timeout in seconds, so a stalled Redis raises instead of hanging requests
+REDIS_TIMEOUT = float(os.environ.get('REDIS_TIMEOUT', 0.25))
+redis_client = None
+if os.environ.get('REDIS_URL'):
+    redis_client = redis.Redis(
+        connection_pool=redis.ConnectionPool.from_url(
+            os.environ['REDIS_URL'],
+            socket_connect_timeout=REDIS_TIMEOUT,
+            socket_timeout=REDIS_TIMEOUT
+        )
+    )
+
+
+# Static response bodies, serialized once at import
+HOME_PAYLOAD = orjson.dumps({
+    'message': 'Web Scraping API',
+    'version': '1.0.0',
+    'endpoints': {
+        '/scrape': 'POST - Basic scraping of a web page',
+        '/scrape/products': 'POST - Extract products from an e-commerce page',
+        '/scrape/batch': 'POST - Basic scraping of several web pages at once',
+        '/health': 'GET - API health check'
+    },
+    'author': 'Victor Kelvin',
+    'documentation': 'https://github.com/victorkelvin/web-scraping-api'
+})
+HEALTH_PREFIX = b'{"status":"healthy","timestamp":"'
+HEALTH_SUFFIX = b'","service":"Web Scraping API"}'
 
 
 # loggin config
@@ -18,118 +52,250 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson, used by jsonify and request/response get_json"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def ojsonify(obj):
+    """Serializes an object to a JSON response with orjson"""
+    return current_app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+
+def normalize_url(parsed):
+    """Normalizes a split URL for use as a cache key"""
+    return parsed._replace(
+        scheme=parsed.scheme.lower(),
+        netloc=parsed.netloc.lower(),
+        fragment=''
+    ).geturl()
+
+
+def compress_etag(etag, payload):
+    """Returns the ETag Flask-Compress gives a payload once compressed (e.g. "<etag>:gzip")"""
+    if len(payload) < current_app.config['COMPRESS_MIN_SIZE']:
+        return etag
+    algorithm = request.accept_encodings.best_match(current_app.config['COMPRESS_ALGORITHM'])
+    return f"{etag}:{algorithm}" if algorithm else etag
+
+
+def scrape_response(payload, cache_status, compressed=None):
+    """
+    Builds a conditional JSON response for a serialized scrape result
+    Args:
+        payload: JSON bytes of the scrape result
+        cache_status: Value of the X-Cache header (HIT or MISS)
+        compressed: Brotli-compressed payload to send as-is, if available
+    """
+    etag = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
+    # Flask-Compress suffixes the ETag with the encoding (e.g. "<etag>:br"),
+    # so a 304 repeats the tag the client matched
+    if_none_match = request.if_none_match
+    matched = next((tag for tag in if_none_match if tag.partition(':')[0] == etag), None)
+    if matched is None and if_none_match.star_tag:
+        matched = f"{etag}:br" if compressed is not None else compress_etag(etag, payload)
+
+    if matched is not None:
+        response = Response(status=304)
+        etag = matched
+    elif compressed is not None:
+        response = Response(compressed, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'br'
+        etag = f"{etag}:br"
+    else:
+        response = Response(payload, mimetype='application/json')
+
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    response.headers['X-Cache'] = cache_status
+    return response
+
+
+def cached(key_prefix, url, scrape, ttl=CACHE_TTL):
+    """
+    Serves a scrape result from Redis, running the scraper on a miss
+    Args:
+        key_prefix: Cache namespace for the endpoint
+        url: URL being scraped, already split into g.parsed_url by SecurityMiddleware
+        scrape: Scraper method called with the URL on a cache miss
+        ttl: Time to live of the cached result in seconds
+    """
+    key = f"{key_prefix}:{hashlib.sha256(normalize_url(g.parsed_url).encode()).hexdigest()}"
+
+    if redis_client is not None:
+        try:
+            payload, compressed = redis_client.mget(key, f"{key}:br")
+        except redis.RedisError as e:
+            logger.error(f"Cache read error for {key}: {e}")
+            payload = None
+
+        if payload is not None:
+            # quality() respects q-values, so "br;q=0" counts as refused
+            if not request.accept_encodings.quality('br'):
+                compressed = None
+            return scrape_response(payload, 'HIT', compressed)
+
+    result = scrape(url)
+
+    if result['status'] == 'error':
+        return ojsonify(result), 500
+
+    payload = orjson.dumps(result)
+    compressed = None
+
+    if redis_client is not None:
+        # Store a brotli copy as well so hits skip recompression
+        compressed = brotli.compress(payload, quality=current_app.config['COMPRESS_BR_LEVEL'])
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.setex(key, ttl, payload)
+            pipe.setex(f"{key}:br", ttl, compressed)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Cache write error for {key}: {e}")
+
+        # Send that copy too, instead of Flask-Compress compressing again
+        if not request.accept_encodings.quality('br'):
+            compressed = None
+
+    return scrape_response(payload, 'MISS', compressed)
+
 
-@app.route('/')
 def home():
     """Root endpoint with API info"""
-    return jsonify({
-        'message': 'Web Scraping API',
-        'version': '1.0.0',
-        'endpoints': {
-            '/scrape': 'POST - Basic scraping of a web page',
-            '/scrape/products': 'POST - Extract products from an e-commerce page',
-            '/health': 'GET - API health check'
-        },
-        'author': 'Victor Kelvin',
-        'documentation': 'https://github.com/victorkelvin/web-scraping-api'
-    })
-
-@app.route('/health')
+    return Response(HOME_PAYLOAD, mimetype='application/json')
+
 def health():
     """Endpoint health check"""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
-        'service': 'Web Scraping API'
-    })
+    timestamp = datetime.now().isoformat().encode()
+    return Response(HEALTH_PREFIX + timestamp + HEALTH_SUFFIX, mimetype='application/json')
 
-@app.route('/scrape', methods=['POST'])
 def scrape_page():
     """Basic scraping of a web page"""
     try:
-        data = request.get_json()
-        
-        if not data or 'url' not in data:
-            return jsonify({
-                'error': 'URL is required',
-                'status': 'error'
-            }), 400
-        
-        url = data['url']
-        
-        # URL basic validation
-        parsed_url = urlparse(url)
-        if not parsed_url.scheme or not parsed_url.netloc:
-            return jsonify({
-                'error': 'Invalid URL',
-                'status': 'error'
-            }), 400
+        # Already validated by SecurityMiddleware
+        url = g.scrape_url
         
         logger.info(f"Scrapiing: {url}")
-        result = scraper.scrape_page_info(url)
-        
-        if result['status'] == 'error':
-            return jsonify(result), 500
-        
-        return jsonify(result)
+        return cached('scrape', url, current_app.extensions['scraper'].scrape_page_info)
         
     except Exception as e:
         logger.error(f"Endpoint error at /scrape: {str(e)}")
-        return jsonify({
+        return ojsonify({
             'error': 'Internal server error',
             'status': 'error'
         }), 500
 
-@app.route('/scrape/products', methods=['POST'])
 def scrape_products():
     """Extract products from an e-commerce page"""
     try:
-        data = request.get_json()
+        # Already validated by SecurityMiddleware
+        url = g.scrape_url
+        
+        logger.info(f"Products Scraping at: {url}")
+        return cached('scrape:products', url, current_app.extensions['scraper'].scrape_products_generic)
         
-        if not data or 'url' not in data:
-            return jsonify({
-                'error': 'URL is required',
+    except Exception as e:
+        logger.error(f"Endpoint error at /scrape/products: {str(e)}")
+        return ojsonify({
+            'error': 'Internal server error',
+            'status': 'error'
+        }), 500
+
+def scrape_batch():
+    """Basic scraping of several web pages concurrently"""
+    try:
+        data = g.json_body
+        
+        if not isinstance(data, dict) or not isinstance(data.get('urls'), list) or not data['urls']:
+            return ojsonify({
+                'error': 'A non-empty list of URLs is required',
                 'status': 'error'
             }), 400
         
-        url = data['url']
+        urls = data['urls']
         
-        # URL basic validation
-        parsed_url = urlparse(url)
-        if not parsed_url.scheme or not parsed_url.netloc:
-            return jsonify({
-                'error': 'Invalid URL',
+        if len(urls) > MAX_BATCH_URLS:
+            return ojsonify({
+                'error': f'Too many URLs (max {MAX_BATCH_URLS})',
                 'status': 'error'
             }), 400
         
-        logger.info(f"Products Scraping at: {url}")
-        result = scraper.scrape_products_generic(url)
+        for url in urls:
+            # URL basic validation
+            parsed_url = parse_url(url)
+            if not parsed_url or not parsed_url.scheme or not parsed_url.netloc:
+                return ojsonify({
+                    'error': f'Invalid URL: {url}',
+                    'status': 'error'
+                }), 400
+            
+            if not current_app.extensions['security_middleware'].is_safe_url(parsed_url):
+                return ojsonify({
+                    'error': 'URL not allowed',
+                    'message': f'{url} is not permitted for scraping',
+                    'status': 'error'
+                }), 403
         
-        if result['status'] == 'error':
-            return jsonify(result), 500
+        logger.info(f"Batch scraping {len(urls)} URLs")
+        results = current_app.extensions['scraper'].scrape_batch(urls)
         
-        return jsonify(result)
+        return ojsonify({
+            'results': results,
+            'total': len(results),
+            'scraped_at': datetime.now().isoformat(),
+            'status': 'success'
+        })
         
     except Exception as e:
-        logger.error(f"Endpoint error at /scrape/products: {str(e)}")
-        return jsonify({
+        logger.error(f"Endpoint error at /scrape/batch: {str(e)}")
+        return ojsonify({
             'error': 'Internal server error',
             'status': 'error'
         }), 500
 
-@app.errorhandler(404)
 def not_found(error):
-    return jsonify({
+    return ojsonify({
         'error': 'Endpoint not found',
         'status': 'error'
     }), 404
 
-@app.errorhandler(500)
 def internal_error(error):
-    return jsonify({
+    return ojsonify({
         'error': 'Internal server error',
         'status': 'error'
     }), 500
 
+def create_app():
+    """Creates and configures the Flask application"""
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    CORS(app)
+    Compress(app)
+    SecurityMiddleware(app, redis_client=redis_client)
+    
+    # One scraper (and HTTP session) per application, i.e. per worker
+    app.extensions['scraper'] = WebScraper()
+    
+    app.add_url_rule('/', view_func=home)
+    app.add_url_rule('/health', view_func=health)
+    app.add_url_rule('/scrape', view_func=scrape_page, methods=['POST'])
+    app.add_url_rule('/scrape/products', view_func=scrape_products, methods=['POST'])
+    app.add_url_rule('/scrape/batch', view_func=scrape_batch, methods=['POST'])
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, internal_error)
+    
+    return app
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only; production runs gunicorn with wsgi:app
+    debug = os.environ.get('FLASK_ENV') == 'development'
+    create_app().run(debug=debug, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
\ No newline at end of file
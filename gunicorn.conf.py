@@ -0,0 +1,21 @@
+"""
+Gunicorn configuration for the API
+"""
+
+import multiprocessing
+import os
+
+bind = '0.0.0.0:5000'
+
+# Scraping is I/O bound, so each gevent worker serves many requests at once
+worker_class = 'gevent'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
+
+
+def post_fork(server, worker):
+    """Gives each worker its own scraper when the app is preloaded in the master"""
+    app = worker.app.callable
+    if app is not None:
+        from scraper.web_scraper import WebScraper
+        app.extensions['scraper'] = WebScraper()
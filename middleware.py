@@ -4,21 +4,41 @@ Security middleware and rate limiting for the API
 
 from functools import wraps
 from flask import request, jsonify, g
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlsplit
 import time
-from collections import defaultdict, deque
+from array import array
+from collections import OrderedDict
 import hashlib
 import logging
 import os
+import re
+import uuid
+import redis
 
 logger = logging.getLogger(__name__)
 
+def parse_url(url):
+    """Splits a URL into its components, returning None if it can't be parsed"""
+    if not isinstance(url, str):
+        return None
+    try:
+        return urlsplit(url)
+    except ValueError:
+        return None
+
 class RateLimiter:
     """Simple in-memory rate limiter"""
     
-    def __init__(self):
-        self.requests = defaultdict(deque)
-        self.blocked_ips = {}
+    # Timestamps are integer nanoseconds from the monotonic clock
+    SECOND = 1_000_000_000
+    NEVER = -(1 << 62)
+    MAX_CLIENTS = 10_000
+    
+    def __init__(self, max_clients=MAX_CLIENTS):
+        # identifier -> [ring of its last `limit` request times, next slot, blocked until],
+        # least recently seen first
+        self.clients = OrderedDict()
+        self.max_clients = max_clients
     
     def is_allowed(self, identifier, limit=100, window=3600):
         """
@@ -28,53 +48,131 @@ class RateLimiter:
             limit: Maximum number of requests
             window: Time window in seconds
         """
-        now = time.time()
+        now = time.monotonic_ns()
+        
+        client = self.clients.get(identifier)
+        if client is None:
+            client = self._add_client(identifier, limit)
+        else:
+            self.clients.move_to_end(identifier)
+        
+        ring, head, blocked_until = client
         
         # Check if IP is temporarily blocked
-        if identifier in self.blocked_ips:
-            if now < self.blocked_ips[identifier]:
-                return False
-            else:
-                del self.blocked_ips[identifier]
+        if now < blocked_until:
+            return False
         
-        # Clean up old requests
-        while (self.requests[identifier] and 
-               now - self.requests[identifier][0] > window):
-            self.requests[identifier].popleft()
+        if len(ring) != limit:
+            ring = client[0] = array('q', [self.NEVER]) * limit
+            head = 0
         
-        # Check limit
-        if len(self.requests[identifier]) >= limit:
+        # The oldest of the last `limit` requests is still inside the window
+        if now - ring[head] <= window * self.SECOND:
             # Block for 1 hour
-            self.blocked_ips[identifier] = now + 3600
+            client[2] = now + 3600 * self.SECOND
+            logger.warning(f"Rate limit exceeded for {identifier}")
+            return False
+        
+        # Record the current request over the oldest one
+        ring[head] = now
+        client[1] = (head + 1) % limit
+        return True
+    
+    def _add_client(self, identifier, limit):
+        """Starts tracking a client, reusing the least recently seen slot when full"""
+        if len(self.clients) >= self.max_clients:
+            _, client = self.clients.popitem(last=False)
+            ring = client[0]
+            if len(ring) == limit:
+                for i in range(limit):
+                    ring[i] = self.NEVER
+            else:
+                ring = array('q', [self.NEVER]) * limit
+        else:
+            ring = array('q', [self.NEVER]) * limit
+        
+        client = [ring, 0, self.NEVER]
+        self.clients[identifier] = client
+        return client
+
+class RedisRateLimiter:
+    """Redis sliding window rate limiter shared by all workers"""
+    
+    # KEYS[1]: request log, KEYS[2]: block flag
+    # ARGV: now (ms), window (ms), limit, request id, block time (s)
+    SLIDING_WINDOW_SCRIPT = """
+    if redis.call('EXISTS', KEYS[2]) == 1 then return 0 end
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1] - ARGV[2])
+    if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+        redis.call('SET', KEYS[2], 1, 'EX', ARGV[5], 'NX')
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[1] .. ':' .. ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+    """
+    
+    def __init__(self, client):
+        self.client = client
+        self.sliding_window = client.register_script(self.SLIDING_WINDOW_SCRIPT)
+    
+    def is_allowed(self, identifier, limit=100, window=3600):
+        """
+        Checks if a request is allowed
+        Args:
+            identifier: IP or unique identifier
+            limit: Maximum number of requests
+            window: Time window in seconds
+        """
+        now_ms = int(time.time() * 1000)
+        
+        try:
+            allowed = self.sliding_window(
+                keys=[f"rl:{identifier}", f"rl:block:{identifier}"],
+                args=[now_ms, window * 1000, limit, uuid.uuid4().hex, 3600]
+            )
+        except redis.RedisError as e:
+            # Fail open so a Redis outage does not take the API down. A stalled
+            # Redis only ends up here because the client has socket timeouts
+            # (REDIS_TIMEOUT in app.py).
+            logger.error(f"Rate limiter unavailable: {e}")
+            return True
+        
+        if not allowed:
             logger.warning(f"Rate limit exceeded for {identifier}")
             return False
         
-        # Add current request
-        self.requests[identifier].append(now)
         return True
 
 class SecurityMiddleware:
     """Security middleware"""
     
-    def __init__(self, app=None):
+    def __init__(self, app=None, redis_client=None):
         self.app = app
-        self.rate_limiter = RateLimiter()
+        if redis_client is not None:
+            self.rate_limiter = RedisRateLimiter(redis_client)
+        else:
+            self.rate_limiter = RateLimiter()
         
         # Suspicious domains (example)
-        self.suspicious_domains = {
+        self.suspicious_domains = frozenset({
             'malware.com', 'phishing.net', 'spam.org'
-        }
+        })
         
-        # Suspicious patterns in URLs
+        # Suspicious patterns in URLs, matched with a single regex
         self.suspicious_patterns = [
             'admin', 'login', 'password', 'secret', 'private'
         ]
+        self.suspicious_pattern_re = re.compile(
+            '|'.join(re.escape(pattern) for pattern in self.suspicious_patterns)
+        )
         
         if app:
             self.init_app(app)
     
     def init_app(self, app):
         """Initializes the middleware with the Flask app"""
+        app.extensions['security_middleware'] = self
         app.before_request(self.before_request)
         app.after_request(self.after_request)
     
@@ -90,16 +188,37 @@ class SecurityMiddleware:
                 'status': 'error'
             }), 429
         
+        # Parse the JSON body once for the scraping endpoints
+        if request.endpoint in ['scrape_page', 'scrape_products', 'scrape_batch']:
+            g.json_body = request.get_json(silent=True)
+        
         # Security validation for scraping URLs
         if request.endpoint in ['scrape_page', 'scrape_products']:
-            data = request.get_json()
-            if data and 'url' in data:
-                if not self.is_safe_url(data['url']):
-                    return jsonify({
-                        'error': 'URL not allowed',
-                        'message': 'This URL is not permitted for scraping',
-                        'status': 'error'
-                    }), 403
+            data = g.json_body
+            if not isinstance(data, dict) or 'url' not in data:
+                return jsonify({
+                    'error': 'URL is required',
+                    'status': 'error'
+                }), 400
+            
+            url = data['url']
+            parsed_url = parse_url(url)
+            if parsed_url is None or not self.is_safe_url(parsed_url):
+                return jsonify({
+                    'error': 'URL not allowed',
+                    'message': 'This URL is not permitted for scraping',
+                    'status': 'error'
+                }), 403
+            
+            # URL basic validation
+            if not parsed_url.scheme or not parsed_url.netloc:
+                return jsonify({
+                    'error': 'Invalid URL',
+                    'status': 'error'
+                }), 400
+            
+            g.scrape_url = url
+            g.parsed_url = parsed_url
         
         # Request log
         g.request_start_time = time.time()
@@ -130,23 +249,26 @@ class SecurityMiddleware:
         else:
             return request.remote_addr
     
-    def is_safe_url(self, url):
-        """Checks if a URL is safe for scraping"""
+    def is_safe_url(self, parsed):
+        """Checks if a URL, already split by parse_url, is safe for scraping"""
         try:
-            parsed = urlparse(url.lower())
-            domain = parsed.netloc
+            # hostname is lowercased and has no port or credentials
+            host = (parsed.hostname or '').rstrip('.')
             
-            # Check suspicious domains
-            if domain in self.suspicious_domains:
-                logger.warning(f"Blocked suspicious domain: {domain}")
-                return False
+            # Check suspicious domains, including their subdomains
+            labels = host.split('.')
+            for i in range(len(labels) - 1):
+                domain = '.'.join(labels[i:])
+                if domain in self.suspicious_domains:
+                    logger.warning(f"Blocked suspicious domain: {host}")
+                    return False
             
             # Check suspicious patterns in path
             path = parsed.path.lower()
-            for pattern in self.suspicious_patterns:
-                if pattern in path:
-                    logger.warning(f"Blocked suspicious pattern '{pattern}' in URL: {url}")
-                    return False
+            match = self.suspicious_pattern_re.search(path)
+            if match:
+                logger.warning(f"Blocked suspicious pattern '{match.group()}' in URL: {parsed.geturl()}")
+                return False
             
             # Check allowed schemes
             if parsed.scheme not in ['http', 'https']:
@@ -156,7 +278,7 @@ class SecurityMiddleware:
             return True
             
         except Exception as e:
-            logger.error(f"Error validating URL {url}: {e}")
+            logger.error(f"Error validating URL {parsed.geturl()}: {e}")
             return False
 
 def require_json(f):
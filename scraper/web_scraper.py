@@ -1,75 +1,212 @@
+import asyncio
+import codecs
+import httpx
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import EncodingDetector
+from lxml import etree
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 from urllib.parse import urljoin
 import re
+import soupsieve
 from datetime import datetime
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+MAX_IMAGES = 10
+MAX_LINKS = 20
+MAX_PRODUCTS = 10
+BATCH_CONCURRENCY = 20
+CHUNK_SIZE = 8192
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+TEXT_TAGS = {'title', 'a'} | HEADING_TAGS
+NON_TEXT_TAGS = {'script', 'style', 'template'}
+# The only elements page info parsing gets events for
+PAGE_INFO_TAGS = TEXT_TAGS | NON_TEXT_TAGS | {'meta', 'img'}
+# Pages starting with a byte order mark are left to libxml2's own detection
+BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+
+def _known_encoding(encoding):
+    """Returns the encoding if Python knows it, None otherwise"""
+    try:
+        codecs.lookup(encoding or '')
+    except LookupError:
+        return None
+    return encoding
+
+
+def _guess_encoding(data):
+    """Guesses the encoding of undeclared HTML like UnicodeDammit: UTF-8, else Windows-1252"""
+    try:
+        # Incremental, so a character cut off at the end of the data still counts
+        codecs.getincrementaldecoder('utf-8')().decode(data)
+    except UnicodeDecodeError:
+        return 'windows-1252'
+    return 'utf-8'
+
+
+def _pull_parser(encoding, tags):
+    """Creates an HTML pull parser reporting start/end events for the given tags"""
+    return etree.HTMLPullParser(events=('start', 'end'), tag=tags, encoding=encoding)
+
+
+def _iter_html_events(chunks, encoding=None, tags=None):
+    """Feeds HTML chunks to a pull parser, yielding start/end events as they are parsed"""
+    encoding = _known_encoding(encoding)
+    parser = None
+    # Leading chunks held back until the encoding of an undeclared page is known
+    pending = []
+    for chunk in chunks:
+        if not chunk:
+            continue
+        
+        if parser is None:
+            if not pending and encoding is None:
+                if chunk.startswith(BOMS):
+                    parser = _pull_parser(None, tags)
+                else:
+                    # Without a server charset, use the page's own declaration
+                    encoding = _known_encoding(EncodingDetector.find_declared_encoding(chunk, is_html=True))
+            
+            if parser is None:
+                pending.append(chunk)
+                # ASCII reads the same in every candidate encoding
+                if encoding is None and chunk.isascii():
+                    continue
+                chunk = b''.join(pending)
+                parser = _pull_parser(encoding or _guess_encoding(chunk), tags)
+        
+        parser.feed(chunk)
+        yield from parser.read_events()
+    
+    if parser is None and pending:
+        # An undeclared page that is ASCII throughout
+        parser = _pull_parser('utf-8', tags)
+        parser.feed(b''.join(pending))
+    
+    if parser is not None:
+        parser.close()
+        yield from parser.read_events()
+
+
+def _text(element):
+    """Returns the stripped text content of an lxml element"""
+    return ''.join(element.itertext()).strip()
+
+
+def _is_product_candidate(name, attrs):
+    """Keeps only the nodes matched by the product selectors when parsing"""
+    classes = attrs.get('class') or ''
+    if not isinstance(classes, str):
+        classes = ' '.join(classes)
+    return ('product' in classes
+            or 'product' in attrs.get('id', '')
+            or 'data-product-id' in attrs
+            or 'item' in classes.split())
+
+
+PRODUCT_STRAINER = SoupStrainer(_is_product_candidate)
+
+# Common product selectors, tried in order
+PRODUCT_CSS = (
+    '[class*="product"]',
+    '[id*="product"]',
+    '[data-product-id]',
+    '.item',
+)
+PRODUCT_SELECTORS = [soupsieve.compile(s) for s in PRODUCT_CSS]
+
+PRICE_RE = re.compile(r'([A-Za-z]{0,3}\$|€|£|¥|₹)\s*[\d.,]+')
+
+# Product field selectors, tried in order
+NAME_CSS = (
+    'h1', 'h2', 'h3',
+    '[class*="title"]', '[class*="name"]', '[class*="product-name"]', '[class*="product-title"]',
+    '[id*="title"]', '[id*="name"]', '[id*="product-name"]', '[id*="product-title"]'
+)
+
+# All price selectors in one selector list, so candidates come from one query
+PRICE_CSS = ', '.join((
+    '[class*="price"]', '[id*="price"]', '[data-price]',
+    '[class*="cost"]', '[id*="cost"]',
+    '[class*="amount"]', '[id*="amount"]',
+    '.product-price', '.price', '.cost', '.amount'
+))
+MAX_PRICE_CANDIDATES = 5
+
+IMAGE_CSS = (
+    'img',
+    '[class*="image"] img', '[class*="img"] img',
+    '[class*="product-image"] img', '[class*="thumb"] img',
+    '[data-src]', '[data-original]'
+)
+
+LINK_CSS = (
+    'a[href]', '[class*="link"] a[href]', '[class*="product-link"] a[href]',
+    '[class*="title"] a[href]', '[class*="name"] a[href]'
+)
+
+
+def _compile(selectors):
+    """Keeps plain tag names for Tag.find and compiles everything else once with soupsieve"""
+    return [s if s.isalnum() else soupsieve.compile(s) for s in selectors]
+
+
+NAME_SELECTORS = _compile(NAME_CSS)
+PRICE_SELECTOR = soupsieve.compile(PRICE_CSS)
+IMAGE_SELECTORS = _compile(IMAGE_CSS)
+LINK_SELECTORS = _compile(LINK_CSS)
+
+# HTML parsers for product pages: BeautifulSoup on lxml, or selectolax's Lexbor
+PARSERS = ('bs4', 'lexbor')
+
+
+def _select_one(element, selector):
+    """Returns the first descendant matching a tag name or compiled selector"""
+    if isinstance(selector, str):
+        return element.find(selector)
+    return selector.select_one(element)
+
 
 class WebScraper:
-    def __init__(self):
+    def __init__(self, parser=None):
+        self.parser = parser or os.environ.get('SCRAPER_PARSER', 'bs4')
+        if self.parser not in PARSERS:
+            raise ValueError(f"Unknown parser: {self.parser} (expected one of {', '.join(PARSERS)})")
+        
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        
+        # Larger pools keep connections (and TLS sessions) to busy hosts alive
+        adapter = HTTPAdapter(
+            pool_connections=100,
+            pool_maxsize=100,
+            max_retries=Retry(total=2, status_forcelist=[502, 503, 504], backoff_factor=0.2)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def scrape_page_info(self, url):
         """Extract basic page information"""
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # basic info
-            title = soup.find('title')
-            title = title.get_text().strip() if title else "Sem título"
-            
-            description = soup.find('meta', attrs={'name': 'description'})
-            description = description.get('content', '').strip() if description else "No description"
-            
-            # Searching for images
-            images = []
-            for img in soup.find_all('img', src=True):
-                img_url = urljoin(url, img['src'])
-                images.append({
-                    'url': img_url,
-                    'alt': img.get('alt', ''),
-                    'title': img.get('title', '')
-                })
-            
-            # Searching for links
-            links = []
-            for link in soup.find_all('a', href=True):
-                link_url = urljoin(url, link['href'])
-                links.append({
-                    'url': link_url,
-                    'text': link.get_text().strip(),
-                    'title': link.get('title', '')
-                })
-            
-            # Extracting headings
-            headings = []
-            for i in range(1, 7):
-                for heading in soup.find_all(f'h{i}'):
-                    headings.append({
-                        'level': i,
-                        'text': heading.get_text().strip()
-                    })
-            
-            return {
-                'url': url,
-                'title': title,
-                'description': description,
-                'images': images[:10],  
-                'links': links[:20],    
-                'headings': headings,
-                'scraped_at': datetime.now().isoformat(),
-                'status': 'success'
-            }
+            response = self.session.get(url, timeout=30, stream=True)
+            try:
+                response.raise_for_status()
+                
+                content_type = response.headers.get('Content-Type', '')
+                encoding = response.encoding if 'charset' in content_type.lower() else None
+                
+                return self.parse_page_info(url, response.iter_content(CHUNK_SIZE), encoding)
+            finally:
+                response.close()
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Scraping error at {url}: {str(e)}")
@@ -80,28 +217,145 @@ class WebScraper:
                 'scraped_at': datetime.now().isoformat()
             }
     
+    def parse_page_info(self, url, chunks, encoding=None):
+        """
+        Extract basic page information while the page is being read
+        Args:
+            url: Page URL, used to resolve relative links
+            chunks: Iterable of raw HTML byte chunks
+            encoding: Charset declared by the server, if any
+        """
+        title = None
+        description = None
+        images = []
+        links = []
+        headings = []
+        
+        # Number of open elements whose text content is still needed
+        open_text_elements = 0
+        # Headings are listed in document order, so their entries are added
+        # on the start tag and their text is filled in on the end tag
+        open_headings = []
+        
+        # Other elements are still parsed but never reach Python
+        for event, element in _iter_html_events(chunks, encoding, PAGE_INFO_TAGS):
+            name = element.tag
+            
+            if event == 'start':
+                if name in TEXT_TAGS:
+                    open_text_elements += 1
+                if name in HEADING_TAGS:
+                    heading = {'level': int(name[1]), 'text': ''}
+                    headings.append(heading)
+                    open_headings.append(heading)
+                continue
+            
+            if name in TEXT_TAGS:
+                open_text_elements -= 1
+            
+            if name == 'title':
+                if title is None:
+                    title = _text(element)
+            elif name == 'meta':
+                if description is None and element.get('name') == 'description':
+                    description = element.get('content', '').strip()
+            elif name == 'img':
+                if len(images) < MAX_IMAGES and element.get('src') is not None:
+                    images.append({
+                        'url': urljoin(url, element.get('src')),
+                        'alt': element.get('alt', ''),
+                        'title': element.get('title', '')
+                    })
+            elif name == 'a':
+                if len(links) < MAX_LINKS and element.get('href') is not None:
+                    links.append({
+                        'url': urljoin(url, element.get('href')),
+                        'text': _text(element),
+                        'title': element.get('title', '')
+                    })
+            elif name in HEADING_TAGS:
+                open_headings.pop()['text'] = _text(element)
+            elif name in NON_TEXT_TAGS:
+                element.text = None
+            
+            # Drop finished subtrees nothing is collecting text from, including
+            # those of ancestors, since filtered elements get no end event
+            if not open_text_elements:
+                element.clear()
+                node = element
+                while node.getparent() is not None:
+                    while node.getprevious() is not None:
+                        del node.getparent()[0]
+                    node = node.getparent()
+        
+        return {
+            'url': url,
+            'title': title if title is not None else "Sem título",
+            'description': description if description is not None else "No description",
+            'images': images,
+            'links': links,
+            'headings': headings,
+            'scraped_at': datetime.now().isoformat(),
+            'status': 'success'
+        }
+    
+    def scrape_batch(self, urls):
+        """Extract basic page information from several pages concurrently"""
+        return asyncio.run(self._scrape_batch(urls))
+    
+    async def _scrape_batch(self, urls):
+        """Fetch pages over a shared HTTP/2 client and parse each one"""
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        limits = httpx.Limits(max_keepalive_connections=100, max_connections=200)
+        
+        async with httpx.AsyncClient(
+            http2=True,
+            limits=limits,
+            timeout=30,
+            follow_redirects=True,
+            headers={'User-Agent': self.session.headers['User-Agent']}
+        ) as client:
+            async def scrape_one(url):
+                async with semaphore:
+                    try:
+                        response = await client.get(url)
+                        response.raise_for_status()
+                    # Malformed URLs raise InvalidURL, or ValueError for bad IDNA hosts,
+                    # before any request is made
+                    except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+                        logger.error(f"Scraping error at {url}: {str(e)}")
+                        return {
+                            'url': url,
+                            'error': str(e),
+                            'status': 'error',
+                            'scraped_at': datetime.now().isoformat()
+                        }
+                
+                return self.parse_page_info(url, [response.content], response.charset_encoding)
+            
+            return await asyncio.gather(*(scrape_one(url) for url in urls))
+    
     def scrape_products_generic(self, url):
         """Try to extract products from a generic e-commerce page"""
         try:
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if self.parser == 'lexbor':
+                soup = LexborHTMLParser(response.content)
+            else:
+                # Only build the subtrees the product selectors can match
+                soup = BeautifulSoup(response.content, 'lxml', parse_only=PRODUCT_STRAINER)
             
             products = []
             
-            # Common product selectors
-            product_selectors = [
-                '[class*="product"]',
-                '[id*="product"]',
-                '[data-product-id]',
-                '.item',
-            ]
-            
-            for selector in product_selectors:
-                product_elements = soup.select(selector)
+            for css, selector in zip(PRODUCT_CSS, PRODUCT_SELECTORS):
+                if self.parser == 'lexbor':
+                    product_elements = soup.css(css)[:MAX_PRODUCTS]
+                else:
+                    product_elements = selector.select(soup, limit=MAX_PRODUCTS)
                 if product_elements:
-                    for element in product_elements[:10]:  # limit to first 10 products
+                    for element in product_elements:
                         product = self.extract_product_info(element, url)
                         if product:
                             products.append(product)
@@ -125,47 +379,31 @@ class WebScraper:
             }
     
     def extract_product_info(self, element, base_url):
-        """Extract product info from a BeautifulSoup element"""
+        """Extract product info from a BeautifulSoup element or Lexbor node"""
+        if isinstance(element, LexborNode):
+            return self.extract_lexbor_product_info(element, base_url)
+        
         try:
             # Try to find product name
-            name_selectors = [
-                'h1', 'h2', 'h3',
-                '[class*="title"]', '[class*="name"]', '[class*="product-name"]', '[class*="product-title"]',
-                '[id*="title"]', '[id*="name"]', '[id*="product-name"]', '[id*="product-title"]'
-            ]
             name = ""
-            for selector in name_selectors:
-                name_elem = element.select_one(selector)
+            for selector in NAME_SELECTORS:
+                name_elem = _select_one(element, selector)
                 if name_elem:
                     name = name_elem.get_text().strip()
                     break
 
             # Try to find price
-            price_selectors = [
-                '[class*="price"]', '[id*="price"]', '[data-price]',
-                '[class*="cost"]', '[id*="cost"]',
-                '[class*="amount"]', '[id*="amount"]',
-                '.product-price', '.price', '.cost', '.amount'
-            ]
-            price = ""
-            for selector in price_selectors:
-                price_elem = element.select_one(selector)
-                if price_elem:
-                    price_text = price_elem.get_text().strip()
-                    price_match = re.search(r'([A-Za-z]{0,3}\$|€|£|¥|₹)\s*[\d.,]+', price_text)
-                    if price_match:
-                        price = price_match.group()
-                        break
+            # One query for all candidates, one regex pass over their texts.
+            # NUL separates them so a match can't span two elements.
+            price_elems = PRICE_SELECTOR.select(element, limit=MAX_PRICE_CANDIDATES)
+            price_text = '\0'.join(elem.get_text().strip() for elem in price_elems)
+            price_match = PRICE_RE.search(price_text)
+            price = price_match.group() if price_match else ""
 
             # Try to find image
-            image_selectors = [
-                'img', '[class*="image"] img', '[class*="img"] img',
-                '[class*="product-image"] img', '[class*="thumb"] img',
-                '[data-src]', '[data-original]'
-            ]
             image = ""
-            for selector in image_selectors:
-                img_elem = element.select_one(selector)
+            for selector in IMAGE_SELECTORS:
+                img_elem = _select_one(element, selector)
                 if img_elem:
                     src = img_elem.get('src') or img_elem.get('data-src') or img_elem.get('data-original')
                     if src:
@@ -173,13 +411,9 @@ class WebScraper:
                         break
 
             # Try to find product link
-            link_selectors = [
-                'a[href]', '[class*="link"] a[href]', '[class*="product-link"] a[href]',
-                '[class*="title"] a[href]', '[class*="name"] a[href]'
-            ]
             link = ""
-            for selector in link_selectors:
-                link_elem = element.select_one(selector)
+            for selector in LINK_SELECTORS:
+                link_elem = selector.select_one(element)
                 if link_elem:
                     link = urljoin(base_url, link_elem.get('href'))
                     break
@@ -196,5 +430,52 @@ class WebScraper:
             logger.error(f"Error at extract product information: {str(e)}")
 
         return None
+    
+    def extract_lexbor_product_info(self, node, base_url):
+        """Extract product info from a selectolax Lexbor node"""
+        try:
+            # Try to find product name
+            name = ""
+            for selector in NAME_CSS:
+                name_elem = node.css_first(selector)
+                if name_elem:
+                    name = name_elem.text().strip()
+                    break
+
+            # Try to find price
+            price_elems = node.css(PRICE_CSS)[:MAX_PRICE_CANDIDATES]
+            price_text = '\0'.join(elem.text().strip() for elem in price_elems)
+            price_match = PRICE_RE.search(price_text)
+            price = price_match.group() if price_match else ""
+
+            # Try to find image
+            image = ""
+            for selector in IMAGE_CSS:
+                img_elem = node.css_first(selector)
+                if img_elem:
+                    attrs = img_elem.attributes
+                    src = attrs.get('src') or attrs.get('data-src') or attrs.get('data-original')
+                    if src:
+                        image = urljoin(base_url, src)
+                        break
+
+            # Try to find product link
+            link = ""
+            for selector in LINK_CSS:
+                link_elem = node.css_first(selector)
+                if link_elem:
+                    link = urljoin(base_url, link_elem.attributes.get('href'))
+                    break
+
+            if name:
+                return {
+                    'name': name,
+                    'price': price,
+                    'image': image,
+                    'link': link
+                }
+
+        except Exception as e:
+            logger.error(f"Error at extract product information: {str(e)}")
 
-scraper = WebScraper()
\ No newline at end of file
+        return None
\ No newline at end of file
@@ -4,29 +4,39 @@ Automated test suite for the Web Scraping API
 
 import unittest
 import requests
-import json
+import requests_mock
+from requests.adapters import HTTPAdapter
+import orjson
+import brotli
 import time
-from unittest.mock import patch, Mock
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, Mock, AsyncMock
 import sys
 import os
 
 # Add root directory to path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from app import app, WebScraper
+    from app import create_app, WebScraper
 except ImportError:
     print("❌ Error: Could not import the application")
     sys.exit(1)
 
+# Base URL of a running API for the integration tests
+API_URL = f"http://localhost:{os.environ.get('API_PORT', '5000')}"
+
+# Large page for the performance tests, built once as bytes
+_LARGE_HTML_BYTES = b"<html><body>" + b"<div>Content</div>" * 1000 + b"</body></html>"
+
 class TestWebScrapingAPI(unittest.TestCase):
     """Tests for the Web Scraping API"""
     
     @classmethod
     def setUpClass(cls):
         """Initial setup for all tests"""
-        cls.base_url = "http://localhost:5000"
-        cls.app = app.test_client()
+        cls.base_url = API_URL
+        cls.app = create_app().test_client()
         cls.app.testing = True
     
     def test_health_endpoint(self):
@@ -34,7 +44,7 @@ class TestWebScrapingAPI(unittest.TestCase):
         response = self.app.get('/health')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['status'], 'healthy')
         self.assertIn('timestamp', data)
         self.assertIn('service', data)
@@ -44,7 +54,7 @@ class TestWebScrapingAPI(unittest.TestCase):
         response = self.app.get('/')
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertIn('message', data)
         self.assertIn('version', data)
         self.assertIn('endpoints', data)
@@ -54,12 +64,12 @@ class TestWebScrapingAPI(unittest.TestCase):
         test_payload = {"url": "https://books.toscrape.com/"}
         
         response = self.app.post('/scrape',
-                               data=json.dumps(test_payload),
+                               data=orjson.dumps(test_payload),
                                content_type='application/json')
         
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['status'], 'success')
         self.assertIn('title', data)
         self.assertIn('scraped_at', data)
@@ -69,12 +79,12 @@ class TestWebScrapingAPI(unittest.TestCase):
         test_payload = {"url": "invalid-url"}
         
         response = self.app.post('/scrape',
-                               data=json.dumps(test_payload),
+                               data=orjson.dumps(test_payload),
                                content_type='application/json')
         
         self.assertEqual(response.status_code, 403)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['status'], 'error')
     
     def test_scrape_endpoint_missing_url(self):
@@ -82,52 +92,183 @@ class TestWebScrapingAPI(unittest.TestCase):
         test_payload = {}
         
         response = self.app.post('/scrape',
-                               data=json.dumps(test_payload),
+                               data=orjson.dumps(test_payload),
                                content_type='application/json')
         
         self.assertEqual(response.status_code, 400)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['status'], 'error')
         self.assertIn('URL is required', data['error'])
     
+    def test_scrape_endpoint_missing_host(self):
+        """Tests scraping a URL without a host"""
+        test_payload = {"url": "https:///no-host"}
+        
+        response = self.app.post('/scrape',
+                               data=orjson.dumps(test_payload),
+                               content_type='application/json')
+        
+        self.assertEqual(response.status_code, 400)
+        
+        data = response.get_json()
+        self.assertEqual(data['error'], 'Invalid URL')
+    
     def test_products_endpoint_valid_url(self):
         """Tests product scraping with a valid URL"""
         test_payload = {"url": "https://books.toscrape.com/"}
         
         response = self.app.post('/scrape/products',
-                               data=json.dumps(test_payload),
+                               data=orjson.dumps(test_payload),
                                content_type='application/json')
         
         self.assertEqual(response.status_code, 200)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['status'], 'success')
         self.assertIn('products', data)
         self.assertIn('total_found', data)
     
+    @patch('app.redis_client')
+    def test_scrape_endpoint_cache_hit(self, mock_redis):
+        """Tests that a cached result is served without scraping"""
+        mock_redis.mget.return_value = [b'{"status": "success", "title": "Cached Page"}', None]
+        test_payload = {"url": "https://example.com"}
+        
+        with patch.object(WebScraper, 'scrape_page_info') as mock_scrape:
+            response = self.app.post('/scrape',
+                                   data=orjson.dumps(test_payload),
+                                   content_type='application/json')
+            mock_scrape.assert_not_called()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Cache'], 'HIT')
+        
+        data = response.get_json()
+        self.assertEqual(data['title'], 'Cached Page')
+        
+        # A repeat request with the returned ETag is not modified
+        response = self.app.post('/scrape',
+                               data=orjson.dumps(test_payload),
+                               content_type='application/json',
+                               headers={'If-None-Match': response.headers['ETag']})
+        
+        self.assertEqual(response.status_code, 304)
+    
+    @patch('app.redis_client')
+    def test_scrape_endpoint_cache_hit_refused_brotli(self, mock_redis):
+        """Tests that a cached brotli copy is not sent to a client that refuses br"""
+        payload = orjson.dumps({"status": "success", "title": "Cached Page"})
+        mock_redis.mget.return_value = [payload, brotli.compress(payload)]
+        
+        response = self.app.post('/scrape',
+                               data=orjson.dumps({"url": "https://example.com"}),
+                               content_type='application/json',
+                               headers={'Accept-Encoding': 'gzip, br;q=0'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers.get('Content-Encoding'), 'br')
+        self.assertEqual(response.get_json()['title'], 'Cached Page')
+    
+    @patch('app.redis_client')
+    def test_scrape_endpoint_cache_miss_compresses_once(self, mock_redis):
+        """Tests that a cache miss sends the brotli copy it stores"""
+        mock_redis.mget.return_value = [None, None]
+        result = {"status": "success", "title": "Fresh Page" * 100}
+        
+        with patch.object(WebScraper, 'scrape_page_info', return_value=result), \
+                patch('brotli.compress', wraps=brotli.compress) as mock_compress:
+            response = self.app.post('/scrape',
+                                   data=orjson.dumps({"url": "https://example.com"}),
+                                   content_type='application/json',
+                                   headers={'Accept-Encoding': 'br'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(mock_compress.call_count, 1)
+        self.assertEqual(orjson.loads(brotli.decompress(response.data)), result)
+    
+    @patch('app.redis_client')
+    def test_scrape_endpoint_not_modified_etag(self, mock_redis):
+        """Tests that a 304 repeats the validator of the representation the client has"""
+        payload = orjson.dumps({"status": "success", "title": "Cached Page" * 100})
+        mock_redis.mget.return_value = [payload, None]
+        
+        def post(headers):
+            return self.app.post('/scrape',
+                                 data=orjson.dumps({"url": "https://example.com"}),
+                                 content_type='application/json',
+                                 headers=headers)
+        
+        response = post({'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        etag = response.headers['ETag']
+        self.assertTrue(etag.endswith(':gzip"'))
+        
+        for if_none_match in (etag, '*'):
+            response = post({'Accept-Encoding': 'gzip', 'If-None-Match': if_none_match})
+            
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.headers['ETag'], etag)
+    
+    def test_batch_endpoint_missing_urls(self):
+        """Tests batch scraping without a list of URLs"""
+        response = self.app.post('/scrape/batch',
+                               data=orjson.dumps({"urls": []}),
+                               content_type='application/json')
+        
+        self.assertEqual(response.status_code, 400)
+        
+        data = response.get_json()
+        self.assertEqual(data['status'], 'error')
+    
+    def test_scrape_endpoint_suspicious_subdomain(self):
+        """Tests that subdomains of suspicious domains are blocked"""
+        test_payload = {"url": "https://WWW.Malware.com:443/index.html"}
+        
+        response = self.app.post('/scrape',
+                               data=orjson.dumps(test_payload),
+                               content_type='application/json')
+        
+        self.assertEqual(response.status_code, 403)
+    
+    def test_scrape_endpoint_suspicious_path(self):
+        """Tests that URLs with suspicious path patterns are blocked"""
+        test_payload = {"url": "https://example.com/Admin/panel"}
+        
+        response = self.app.post('/scrape',
+                               data=orjson.dumps(test_payload),
+                               content_type='application/json')
+        
+        self.assertEqual(response.status_code, 403)
+        
+        data = response.get_json()
+        self.assertEqual(data['status'], 'error')
+    
     def test_404_handler(self):
         """Tests the handler for not found endpoints"""
         response = self.app.get('/nonexistent-endpoint')
         self.assertEqual(response.status_code, 404)
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(data['status'], 'error')
 
 class TestWebScraper(unittest.TestCase):
     """Tests for the WebScraper class"""
     
-    def setUp(self):
-        """Setup for each test"""
-        self.scraper = WebScraper()
-    
-    @patch('requests.Session.get')
-    def test_scrape_page_info_success(self, mock_get):
-        """Tests successful scraping"""
-        # Mock HTTP response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.content = b'''
+    @classmethod
+    def setUpClass(cls):
+        """One scraper (and HTTP session) shared by all tests, served by a mock adapter"""
+        from scraper.web_scraper import CHUNK_SIZE
+        
+        cls.scraper = WebScraper()
+        cls.lexbor_scraper = WebScraper(parser='lexbor')
+        cls.adapter = requests_mock.Adapter()
+        for scraper in (cls.scraper, cls.lexbor_scraper):
+            scraper.session.mount('https://', cls.adapter)
+        
+        cls.adapter.register_uri('GET', 'https://example.com/page', content=b'''
         <html>
             <head>
                 <title>Test Page</title>
@@ -139,11 +280,71 @@ class TestWebScraper(unittest.TestCase):
                 <img src="/image1.jpg" alt="Image 1">
             </body>
         </html>
-        '''
-        mock_response.raise_for_status.return_value = None
-        mock_get.return_value = mock_response
+        ''')
         
-        result = self.scraper.scrape_page_info("https://example.com")
+        body = ('<h2>Intro</h2>'
+                + '<a href="/page">Page</a><img src="/pic.jpg">' * 30
+                + '<h1>Footer</h1>')
+        cls.adapter.register_uri('GET', 'https://example.com/long',
+                                 content=f'<html><body>{body}</body></html>'.encode())
+        
+        head = b'<html><head><title>Chunked</title></head><body><script>'
+        # Split the closing script tag across the first chunk boundary
+        cls.adapter.register_uri('GET', 'https://example.com/chunked', content=(
+            head + b'x' * (CHUNK_SIZE - len(head) - 4)
+            + b'</script><h1>After Script</h1></body></html>'
+        ))
+        
+        cls.adapter.register_uri('GET', 'https://example.com/commented', content=(
+            b'<!-- generated --><html><body><div><a href="/link1">Link 1</a></div></body></html>'
+        ))
+        
+        # Undeclared Windows-1252, with the first non-ASCII byte past the first chunk
+        cls.adapter.register_uri('GET', 'https://example.com/cp1252', content=(
+            b'<html><head><title>Caf\xe9</title></head><body>' + b'<p>Menu</p>' * 1000
+            + b'<h1>It\x92s open</h1></body></html>'
+        ))
+        
+        cls.adapter.register_uri('GET', 'https://example.com/utf16', content=(
+            '\ufeff<html><head><title>Café</title></head><body><h1>Menu</h1></body></html>'
+        ).encode('utf-16-le'))
+        
+        cls.adapter.register_uri('GET', 'https://example.com/down',
+                                 exc=requests.exceptions.ConnectionError("Connection failed"))
+        
+        cls.adapter.register_uri('GET', 'https://example.com/catalogue', content=b'''
+        <html>
+            <body>
+                <nav><a href="/home">Home</a></nav>
+                <article class="product_pod">
+                    <h3><a href="/book/1">First Book</a></h3>
+                    <p class="price_color">\xc2\xa351.77</p>
+                </article>
+                <article class="product_pod">
+                    <h3><a href="/book/2">Second Book</a></h3>
+                    <p class="price_color">\xc2\xa353.74</p>
+                </article>
+            </body>
+        </html>
+        ''')
+        
+        cls.adapter.register_uri('GET', 'https://example.com/product', content=b'''
+        <div class="product">
+            <h2>Test Product</h2>
+            <span class="price">R$ 99,90</span>
+            <img data-src="/product.jpg" alt="Product">
+            <a href="/product/123">View Product</a>
+        </div>
+        ''')
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.scraper.session.close()
+        cls.lexbor_scraper.session.close()
+    
+    def test_scrape_page_info_success(self):
+        """Tests successful scraping"""
+        result = self.scraper.scrape_page_info("https://example.com/page")
         
         self.assertEqual(result['status'], 'success')
         self.assertEqual(result['title'], 'Test Page')
@@ -152,22 +353,95 @@ class TestWebScraper(unittest.TestCase):
         self.assertTrue(len(result['links']) > 0)
         self.assertTrue(len(result['images']) > 0)
     
-    @patch('requests.Session.get')
-    def test_scrape_page_info_error(self, mock_get):
-        """Tests error handling in scraping"""
-        # Mock connection error
-        mock_get.side_effect = requests.exceptions.ConnectionError("Connection failed")
+    def test_scrape_page_info_limits(self):
+        """Tests that images and links are capped and headings keep page order"""
+        result = self.scraper.scrape_page_info("https://example.com/long")
         
-        result = self.scraper.scrape_page_info("https://example.com")
+        self.assertEqual(len(result['images']), 10)
+        self.assertEqual(len(result['links']), 20)
+        self.assertEqual([h['level'] for h in result['headings']], [2, 1])
+    
+    def test_scrape_page_info_chunk_boundary(self):
+        """Tests that markup split across streamed chunks is parsed intact"""
+        result = self.scraper.scrape_page_info("https://example.com/chunked")
+        
+        self.assertEqual(result['title'], 'Chunked')
+        self.assertEqual(result['headings'], [{'level': 1, 'text': 'After Script'}])
+    
+    def test_scrape_page_info_leading_comment(self):
+        """Tests a page with a comment before the root element"""
+        result = self.scraper.scrape_page_info("https://example.com/commented")
+        
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['links'][0]['url'], 'https://example.com/link1')
+    
+    def test_scrape_page_info_undeclared_encoding(self):
+        """Tests that pages without a declared charset are decoded like UnicodeDammit would"""
+        result = self.scraper.scrape_page_info("https://example.com/cp1252")
+        
+        self.assertEqual(result['title'], 'Café')
+        self.assertEqual(result['headings'], [{'level': 1, 'text': 'It\u2019s open'}])
+    
+    def test_scrape_page_info_byte_order_mark(self):
+        """Tests that a UTF-16 page is detected from its byte order mark"""
+        result = self.scraper.scrape_page_info("https://example.com/utf16")
+        
+        self.assertEqual(result['title'], 'Café')
+        self.assertEqual(result['headings'], [{'level': 1, 'text': 'Menu'}])
+    
+    def test_scrape_page_info_error(self):
+        """Tests error handling in scraping"""
+        result = self.scraper.scrape_page_info("https://example.com/down")
         
         self.assertEqual(result['status'], 'error')
         self.assertIn('error', result)
     
+    def test_scrape_products_generic_success(self):
+        """Tests product scraping of a listing page"""
+        result = self.scraper.scrape_products_generic("https://example.com/catalogue")
+        
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['total_found'], 2)
+        self.assertEqual(result['products'][0]['name'], 'First Book')
+        self.assertEqual(result['products'][0]['price'], '£51.77')
+        self.assertEqual(result['products'][0]['link'], 'https://example.com/book/1')
+    
+    @patch('httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_scrape_batch(self, mock_get):
+        """Tests concurrent scraping of several pages"""
+        mock_response = Mock()
+        mock_response.content = b'<html><head><title>Batch Page</title></head></html>'
+        mock_response.charset_encoding = None
+        mock_response.raise_for_status.return_value = None
+        mock_get.return_value = mock_response
+        
+        results = self.scraper.scrape_batch(["https://example.com/1", "https://example.com/2"])
+        
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[1]['url'], 'https://example.com/2')
+        self.assertTrue(all(r['title'] == 'Batch Page' for r in results))
+    
+    @patch('httpx.AsyncClient.send', new_callable=AsyncMock)
+    def test_scrape_batch_malformed_host(self, mock_send):
+        """Tests that a malformed URL only fails its own batch result"""
+        mock_response = Mock()
+        mock_response.content = b'<html><head><title>Batch Page</title></head></html>'
+        mock_response.charset_encoding = None
+        mock_response.raise_for_status.return_value = None
+        mock_send.return_value = mock_response
+        
+        results = self.scraper.scrape_batch(["https://example.com/1", "http://xn--/"])
+        
+        self.assertEqual(results[0]['title'], 'Batch Page')
+        self.assertEqual(results[1]['url'], 'http://xn--/')
+        self.assertEqual(results[1]['status'], 'error')
+        self.assertIn('error', results[1])
+    
     def test_extract_product_info(self):
         """Tests product information extraction"""
         from bs4 import BeautifulSoup
         
-        html = '''
+        html = b'''
         <div class="product">
             <h2>Test Product</h2>
             <span class="price">R$ 99,90</span>
@@ -176,7 +450,7 @@ class TestWebScraper(unittest.TestCase):
         </div>
         '''
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = BeautifulSoup(html, 'lxml')
         product_element = soup.find('div', class_='product')
         
         result = self.scraper.extract_product_info(product_element, "https://example.com")
@@ -186,37 +460,153 @@ class TestWebScraper(unittest.TestCase):
         self.assertEqual(result['price'], 'R$ 99,90')
         self.assertIn('product.jpg', result['image'])
         self.assertIn('/product/123', result['link'])
+    
+    def test_scrape_products_generic_lexbor(self):
+        """Tests product scraping with the Lexbor parser"""
+        result = self.lexbor_scraper.scrape_products_generic("https://example.com/product")
+        
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['total_found'], 1)
+        self.assertEqual(result['products'][0], {
+            'name': 'Test Product',
+            'price': 'R$ 99,90',
+            'image': 'https://example.com/product.jpg',
+            'link': 'https://example.com/product/123'
+        })
 
+class TestRateLimiter(unittest.TestCase):
+    """Tests for the in-memory rate limiter"""
+    
+    def test_blocks_after_limit(self):
+        """Tests that a client is blocked once it exceeds the limit"""
+        from middleware import RateLimiter
+        
+        limiter = RateLimiter()
+        allowed = [limiter.is_allowed("10.0.0.1", limit=3) for _ in range(5)]
+        
+        self.assertEqual(allowed, [True, True, True, False, False])
+        self.assertTrue(limiter.is_allowed("10.0.0.2", limit=3))
+    
+    def test_evicts_least_recent_client(self):
+        """Tests that the number of tracked clients stays bounded"""
+        from middleware import RateLimiter
+        
+        limiter = RateLimiter(max_clients=2)
+        for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.1", "10.0.0.3"):
+            limiter.is_allowed(ip, limit=3)
+        
+        self.assertEqual(list(limiter.clients), ["10.0.0.1", "10.0.0.3"])
+    
+    def test_redis_blocks_after_limit(self):
+        """Tests that the Redis limiter blocks a client once it exceeds the limit"""
+        import fakeredis
+        from middleware import RedisRateLimiter
+        
+        client = fakeredis.FakeRedis()
+        limiter = RedisRateLimiter(client)
+        allowed = [limiter.is_allowed("10.0.0.1", limit=3) for _ in range(5)]
+        
+        self.assertEqual(allowed, [True, True, True, False, False])
+        self.assertTrue(client.exists("rl:block:10.0.0.1"))
+        self.assertTrue(limiter.is_allowed("10.0.0.2", limit=3))
+    
+    def test_redis_fails_open(self):
+        """Tests that requests are allowed when Redis is unavailable"""
+        import redis
+        from middleware import RedisRateLimiter
+        
+        client = Mock()
+        client.register_script.return_value.side_effect = redis.ConnectionError("Connection refused")
+        limiter = RedisRateLimiter(client)
+        
+        self.assertTrue(limiter.is_allowed("10.0.0.1", limit=3))
+    
+    def test_redis_stalled_fails_open(self):
+        """Tests that a Redis that never answers times out and fails open"""
+        import redis
+        import socket
+        from app import REDIS_TIMEOUT
+        from middleware import RedisRateLimiter
+        
+        # Connections are accepted by the kernel but nothing ever replies
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        self.addCleanup(server.close)
+        
+        client = redis.Redis.from_url(
+            f"redis://127.0.0.1:{server.getsockname()[1]}/0",
+            socket_connect_timeout=REDIS_TIMEOUT,
+            socket_timeout=REDIS_TIMEOUT
+        )
+        self.addCleanup(client.close)
+        limiter = RedisRateLimiter(client)
+        
+        start_time = time.time()
+        allowed = limiter.is_allowed("10.0.0.1", limit=3)
+        
+        self.assertTrue(allowed)
+        self.assertLess(time.time() - start_time, 5.0)
+
+def _probe_api():
+    """Checks once if the API can be tested: in-process, or running at API_URL with INTEGRATION"""
+    if not os.environ.get('INTEGRATION'):
+        return True
+    try:
+        return requests.get(f"{API_URL}/health", timeout=5).status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+@unittest.skipUnless(_probe_api(), f"API is not running on {API_URL}")
 class TestAPIIntegration(unittest.TestCase):
-    """API integration tests (requires API running)"""
+    """API integration tests (against a running API when INTEGRATION is set)"""
     
     @classmethod
     def setUpClass(cls):
-        """Checks if the API is running"""
-        try:
-            response = requests.get("http://localhost:5000/health", timeout=5)
-            if response.status_code != 200:
-                raise Exception("API is not responding")
-            cls.api_available = True
-        except:
-            cls.api_available = False
-    
-    def setUp(self):
-        """Skips tests if the API is not available"""
-        if not self.api_available:
-            self.skipTest("API is not running on localhost:5000")
+        """Serves the API in-process unless testing a running API"""
+        cls.integration = bool(os.environ.get('INTEGRATION'))
+        if cls.integration:
+            # Keep-alive connections to the running API
+            cls.session = requests.Session()
+            cls.session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+            return
+        
+        # Without a running API, use the test client and a canned target page
+        cls.app = create_app().test_client()
+        cls.mocker = requests_mock.Mocker()
+        cls.mocker.start()
+        cls.mocker.get(
+            "https://books.toscrape.com/",
+            content=b'<html><head><title>All products | Books to Scrape</title></head></html>',
+            headers={'Content-Type': 'text/html; charset=utf-8'}
+        )
+    
+    @classmethod
+    def tearDownClass(cls):
+        if cls.integration:
+            cls.session.close()
+        else:
+            cls.mocker.stop()
+    
+    def post(self, path, payload):
+        """Posts JSON to the API, returning the status code and JSON body"""
+        if self.integration:
+            response = self.session.post(f"{API_URL}{path}", data=orjson.dumps(payload),
+                                         headers={'Content-Type': 'application/json'}, timeout=10)
+            return response.status_code, response.json()
+        
+        response = self.app.post(path, data=orjson.dumps(payload), content_type='application/json')
+        return response.status_code, response.get_json()
     
     def test_full_scraping_workflow(self):
         """Tests the full scraping workflow"""
         # Test with a site we know works
         payload = {"url": "https://books.toscrape.com/"}
         
-        response = requests.post("http://localhost:5000/scrape", 
-                               json=payload, timeout=10)
+        status_code, data = self.post("/scrape", payload)
         
-        self.assertEqual(response.status_code, 200)
+        self.assertEqual(status_code, 200)
         
-        data = response.json()
         self.assertEqual(data['status'], 'success')
         self.assertIn('title', data)
         self.assertIn('scraped_at', data)
@@ -225,13 +615,9 @@ class TestAPIIntegration(unittest.TestCase):
         """Tests behavior with multiple requests"""
         payload = {"url": "https://books.toscrape.com/"}
         
-        # Make multiple requests quickly
-        responses = []
-        for i in range(3):
-            response = requests.post("http://localhost:5000/scrape", 
-                                   json=payload, timeout=10)
-            responses.append(response.status_code)
-            time.sleep(0.1)  # Small pause
+        # Make multiple requests at once
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            responses = list(pool.map(lambda _: self.post("/scrape", payload)[0], range(3)))
         
         # All requests should succeed
         for status_code in responses:
@@ -240,21 +626,19 @@ class TestAPIIntegration(unittest.TestCase):
 class TestPerformance(unittest.TestCase):
     """Performance tests"""
     
-    def setUp(self):
-        self.scraper = WebScraper()
+    @classmethod
+    def setUpClass(cls):
+        cls.scraper = WebScraper()
+        cls.adapter = requests_mock.Adapter()
+        cls.adapter.register_uri('GET', 'https://example.com', content=_LARGE_HTML_BYTES)
+        cls.scraper.session.mount('https://', cls.adapter)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.scraper.session.close()
     
-    @patch('requests.Session.get')
-    def test_scraping_performance(self, mock_get):
+    def test_scraping_performance(self):
         """Tests if scraping executes in a reasonable time"""
-        # Mock large response
-        large_content = "<html><body>" + "<div>Content</div>" * 1000 + "</body></html>"
-        
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.content = large_content.encode()
-        mock_response.raise_for_status.return_value = None
-        mock_get.return_value = mock_response
-        
         start_time = time.time()
         result = self.scraper.scrape_page_info("https://example.com")
         end_time = time.time()
@@ -279,7 +663,8 @@ def run_test_suite():
     # Final report
     print("\n" + "=" * 60)
     print("📊 FINAL TEST REPORT")
-    print(f"✅ Tests run: {result.testsRun}")
+    tests_run = result.testsRun
+    print(f"✅ Tests run: {tests_run}")
     print(f"❌ Failures: {len(result.failures)}")
     print(f"🚫 Errors: {len(result.errors)}")
     print(f"⏭️  Skipped: {len(result.skipped)}")
@@ -287,14 +672,14 @@ def run_test_suite():
     if result.failures:
         print("\n🔴 FAILURES:")
         for test, traceback in result.failures:
-            print(f"  • {test}: {traceback.split('AssertionError: ')[-1].split(chr(10))[0]}")
+            print(f"  • {test}: {traceback.rpartition('AssertionError: ')[2].partition(chr(10))[0]}")
     
     if result.errors:
         print("\n🔴 ERRORS:")
         for test, traceback in result.errors:
-            print(f"  • {test}: {traceback.split(chr(10))[-2]}")
+            print(f"  • {test}: {traceback.rstrip(chr(10)).rpartition(chr(10))[2]}")
     
-    success_rate = ((result.testsRun - len(result.failures) - len(result.errors)) / result.testsRun * 100) if result.testsRun > 0 else 0
+    success_rate = ((tests_run - len(result.failures) - len(result.errors)) / tests_run * 100) if tests_run > 0 else 0
     print(f"\n🎯 Success Rate: {success_rate:.1f}%")
     
     if success_rate >= 90:
@@ -307,5 +692,12 @@ def run_test_suite():
     return result.wasSuccessful()
 
 if __name__ == "__main__":
-    success = run_test_suite()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    try:
+        import xdist  # noqa: F401
+    except ImportError:
+        success = run_test_suite()
+        sys.exit(0 if success else 1)
+    
+    # Spread the tests across all CPU cores with pytest-xdist
+    import pytest
+    sys.exit(pytest.main(["-n", "auto", "--tb=short", __file__]))
\ No newline at end of file